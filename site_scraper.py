@@ -1,31 +1,139 @@
 import os
+import posixpath
 import re
 import json
+import hashlib
+import itertools
+import tempfile
 import asyncio
 import logging
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, urlsplit
 from pathlib import Path
-import requests
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 import undetected_chromedriver as uc
 from selenium.webdriver.chrome.options import Options
 from tqdm import tqdm
-import cssutils
+from tqdm.contrib.logging import logging_redirect_tqdm
 import aiohttp
+import aiofiles
 import platform
+from collections import OrderedDict
 
-# Suppress cssutils warnings about modern CSS properties
-cssutils.log.setLevel(logging.ERROR)
+# Mode for saved resources, as open() would create them under the process umask
+_umask = os.umask(0)
+os.umask(_umask)
+_FILE_MODE = 0o666 & ~_umask
+
+# Patterns used to pull resource paths out of scripts and stylesheets; they
+# run on the raw response bytes so bodies are never decoded as a whole
+_VAR_ASSIGN_RE = re.compile(rb'(?:const|let|var)\s+(\w+)\s*=\s*[\'"]([^\'"\s]+)[\'"]')
+_DYN_PATHS_RE = re.compile(rb'(?:const|let|var)\s+(\w+)\s*=\s*\{([^}]+)\}')
+_PAIR_RE = re.compile(rb'(\w+):\s*[\'"]([^\'"\s]+)[\'"]')
+_IMPORT_RE = re.compile(rb'(?:import|require)\s*\(\s*[\'"]([^\'"\s]+)[\'"]')
+_JS_RESOURCE_PATTERNS = (
+    r'(?:src|href|url):\s*[\'"]([^\'"\s]+)[\'"]',
+    r'(?:load|fetch|import)\s*\([\'"]([^\'"\s]+)[\'"]',
+    r'new\s+(?:Image|Audio)\([\'"]([^\'"\s]+)[\'"]',
+    r'\.load\s*\([\'"]([^\'"\s]+)[\'"]',
+    r'\.loadTexture\s*\([\'"]([^\'"\s]+)[\'"]',
+    r'\.setPath\s*\([\'"]([^\'"\s]+)[\'"]',
+    r'\.join\s*\([\'"]([^\'"\s]+)[\'"]',
+    r'\.resolve\s*\([\'"]([^\'"\s]+)[\'"]',
+    r'[\'"](/[^\'"\s]+\.(?:js|css|png|jpg|jpeg|gif|svg|mp3|wav|json|wasm|glb|gltf|bin|basis|ktx2|drc|ico))[\'"]'
+)
+# Every pattern above has exactly one capture group, so a single alternation
+# scans the script once and the matching branch is found via lastindex
+_JS_RESOURCE_RE = re.compile('|'.join(f'(?:{p})' for p in _JS_RESOURCE_PATTERNS).encode())
+# Template literals get their own pass: inside the alternation a matched
+# literal would swallow the quoted paths within it
+_JS_TEMPLATE_RE = re.compile(rb'`([^`]+?\.(?:mp3|wav|ogg|glb|gltf|jpg|png))`')
+# Number of fetched scripts whose scan results are kept in SiteScraper.js_cache
+_JS_CACHE_SIZE = 256
+_CSS_URL_PATTERNS = tuple(re.compile(p.encode()) for p in [
+    r'url\([\'"]?([^\'"\)]+)[\'"]?\)',
+    r'@import\s+[\'"]([^\'"\s]+)[\'"]'
+])
+# XPath queries over the parsed page, evaluated by libxml2
+_SCRIPT_SRC_XPATH = etree.XPath('//script/@src', smart_strings=False)
+_INLINE_SCRIPT_XPATH = etree.XPath('//script/text()', smart_strings=False)
+_STYLESHEET_HREF_XPATH = etree.XPath(
+    "//link[contains(concat(' ', normalize-space(@rel), ' '), ' stylesheet ')]/@href",
+    smart_strings=False
+)
+_LINK_HREF_XPATH = etree.XPath('//a/@href', smart_strings=False)
+_MODEL_TEXTURE_EXTENSIONS = ('glb', 'gltf', 'bin', 'jpg', 'png', 'basis')
+# Attribute values on any tag that mention a model/texture extension, compared
+# case-insensitively, in place of walking every attribute of every tag in Python
+_EXT_ATTR_XPATH = etree.XPath(
+    '//@*[' + ' or '.join(
+        f"contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '.{ext}')"
+        for ext in _MODEL_TEXTURE_EXTENSIONS
+    ) + ']',
+    smart_strings=False
+)
+# str.translate tables for turning URLs into file names: the site folder keeps
+# only word characters and dashes, and saved paths lose the characters that
+# Windows rejects in file names
+_SAFE_NAME_TABLE = {c: '_' for c in range(256) if not (chr(c).isalnum() or chr(c) in '-_')}
+_SAFE_PATH_TABLE = {c: '_' for c in [*range(32), *map(ord, '<>:"\\|?*')]}
+
+_HELP = """Commands:
+  done    - Start scraping the current state
+  help    - Show this help message
+  url     - Show current URL
+  wait    - Wait 5 more seconds for loading
+  refresh - Refresh the page"""
+
+# References the string-concatenation fast path in _make_url_joiner cannot handle
+_URLJOIN_NEEDED_RE = re.compile(r'[\x00-\x20:;?#]|//|/\.|^\.')
+
+def _url_key(url):
+    """Return a 16-byte digest of url, used in place of the URL in the seen-sets."""
+    return hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+def _make_url_joiner(base_url):
+    """Return a urljoin(base_url, ref) equivalent that parses base_url only once."""
+    parts = urlsplit(base_url)
+    root = f'{parts.scheme}://{parts.netloc}'
+    directory = root + (parts.path[:parts.path.rfind('/') + 1] or '/')
+    # urljoin normalizes the base path too, so only a plain one can be reused
+    relative_ok = not _URLJOIN_NEEDED_RE.search(parts.path)
+
+    def join(ref):
+        # Plain root- and document-relative paths are concatenated directly;
+        # anything urljoin would rewrite (whitespace and control characters,
+        # schemes, empty or dot segments, params, queries, fragments) goes
+        # through it
+        if not ref or _URLJOIN_NEEDED_RE.search(ref):
+            return urljoin(base_url, ref)
+        if ref.startswith('/'):
+            return root + ref
+        if not relative_ok:
+            return urljoin(base_url, ref)
+        return directory + ref
+
+    return join
 
 class SiteScraper:
     def __init__(self, base_url, output_dir="scraped_site", interactive=False):
         self.base_url = base_url
         # Create a safe folder name from the URL
-        safe_folder_name = re.sub(r'[^\w\-_]', '_', urlparse(base_url).netloc)
+        safe_folder_name = urlparse(base_url).netloc.translate(_SAFE_NAME_TABLE)
         self.output_dir = Path(output_dir) / safe_folder_name
+        # Seen-sets hold _url_key() digests rather than the URLs themselves
+        # to keep memory flat on large crawls
         self.visited_urls = set()
-        self.session = requests.Session()
         self.downloaded_files = set()
+        self.downloads_in_flight = set()
+        self.created_dirs = set()
+        # Relative paths found in each fetched script, keyed by blake2b of its
+        # content, least recently used first
+        self.js_cache = OrderedDict()
+        # Shared aiohttp session and browser lock, created in scrape() once
+        # the event loop is running, and the crawl-wide download progress bar
+        self.session = None
+        self.driver_lock = None
+        self.progress = None
         self.interactive = interactive
         self.setup_logging()
         self.setup_selenium()
@@ -68,6 +176,12 @@ class SiteScraper:
             self.logger.error(f"Failed to initialize Chrome: {str(e)}")
             raise
 
+    def ensure_dir(self, path):
+        """Create a directory once, skipping the syscalls on later calls."""
+        if path not in self.created_dirs:
+            path.mkdir(parents=True, exist_ok=True)
+            self.created_dirs.add(path)
+
     def create_directory_structure(self, url_path):
         """Create necessary directory structure for saving files."""
         if not url_path or url_path == '/':
@@ -78,297 +192,362 @@ class SiteScraper:
         path = parsed_url.path.lstrip('/')
         
         # Remove query parameters from filename if they exist
-        path = path.split('?')[0]
+        path = path.split('?')[0].translate(_SAFE_PATH_TABLE)
         
         # Create the full path while maintaining the original structure
         full_path = self.output_dir / path
         
         # Create parent directories if they don't exist
-        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        self.ensure_dir(full_path.parent)
         
         return full_path
 
     async def download_resource(self, url, session):
-        if url in self.downloaded_files:
+        if _url_key(url) in self.downloaded_files:
+            return None
+        
+        # Only resources under the site are saved, so others are not fetched
+        if not url.startswith(self.base_url) and not url.startswith('/'):
             return None
             
         try:
             async with session.get(url) as response:
                 if response.status == 200:
-                    content = await response.read()
-                    
-                    if not url.startswith(self.base_url) and not url.startswith('/'):
-                        return content
-                    
                     if url.startswith(self.base_url):
                         url_path = url[len(self.base_url):]
                     else:
                         url_path = url
                     
                     save_path = self.create_directory_structure(url_path)
-                    os.makedirs(os.path.dirname(save_path), exist_ok=True)
                     
-                    with open(save_path, 'wb') as f:
-                        f.write(content)
-                    self.downloaded_files.add(url)
+                    # Stream straight to disk so large models and media are never
+                    # held in memory whole, via a temp file unique to this transfer:
+                    # a failed or cancelled one never leaves a truncated resource
+                    # behind, and URLs differing only by query (fa.eot?v=4.7.0 and
+                    # fa.eot?#iefix) never share a partial file
+                    fd, part_name = tempfile.mkstemp(dir=save_path.parent, prefix=save_path.name + '.', suffix='.part')
+                    part_path = Path(part_name)
+                    try:
+                        async with aiofiles.open(fd, 'wb') as f:
+                            async for chunk in response.content.iter_chunked(65536):
+                                await f.write(chunk)
+                        # mkstemp creates files owner-only; give them the usual mode
+                        os.chmod(part_path, _FILE_MODE)
+                        os.replace(part_path, save_path)
+                    except BaseException:
+                        part_path.unlink(missing_ok=True)
+                        raise
+                    self.downloaded_files.add(_url_key(url))
                     self.logger.info(f"Downloaded: {url} -> {save_path}")
-                    return content
+                    return save_path
                 else:
                     self.logger.warning(f"Failed to download {url}: Status {response.status}")
         except Exception as e:
             self.logger.error(f"Error downloading {url}: {str(e)}")
         return None
 
-    def analyze_javascript(self, js_content, base_url):
+    def analyze_javascript(self, js_content, base_url, cacheable=False):
+        # Fetched bundles like three.min.js repeat across pages, so their regex
+        # scan is kept in a bounded LRU keyed by content hash and only the join
+        # against base_url is redone. Inline scripts usually differ per page
+        # (nonces, tokens, page state) and are scanned without caching.
+        if not cacheable:
+            paths = self.scan_javascript(js_content)
+        else:
+            key = hashlib.blake2b(js_content, digest_size=16).digest()
+            paths = self.js_cache.get(key)
+            if paths is None:
+                paths = self.scan_javascript(js_content)
+                self.js_cache[key] = paths
+                if len(self.js_cache) > _JS_CACHE_SIZE:
+                    self.js_cache.popitem(last=False)
+            else:
+                self.js_cache.move_to_end(key)
+        join = _make_url_joiner(base_url)
+        return {join(path) for path in paths}
+
+    def scan_javascript(self, js_content):
         resources = set()
         path_vars = {}
-        var_assignments = re.finditer(r'(?:const|let|var)\s+(\w+)\s*=\s*[\'"]([^\'"\s]+)[\'"]', js_content)
+        var_assignments = _VAR_ASSIGN_RE.finditer(js_content)
         for match in var_assignments:
             var_name, value = match.groups()
             path_vars[var_name] = value
 
-        dynamic_paths = re.finditer(r'(?:const|let|var)\s+(\w+)\s*=\s*\{([^}]+)\}', js_content)
+        dynamic_paths = _DYN_PATHS_RE.finditer(js_content)
         for match in dynamic_paths:
             var_name, content = match.groups()
-            pairs = re.finditer(r'(\w+):\s*[\'"]([^\'"\s]+)[\'"]', content)
+            pairs = _PAIR_RE.finditer(content)
             for pair in pairs:
                 key, value = pair.groups()
-                path_vars[f"{var_name}.{key}"] = value
+                path_vars[var_name + b'.' + key] = value
 
-        patterns = [
-            r'(?:src|href|url):\s*[\'"]([^\'"\s]+)[\'"]',
-            r'(?:load|fetch|import)\s*\([\'"]([^\'"\s]+)[\'"]',
-            r'new\s+(?:Image|Audio)\([\'"]([^\'"\s]+)[\'"]',
-            r'\.load\s*\([\'"]([^\'"\s]+)[\'"]',
-            r'\.loadTexture\s*\([\'"]([^\'"\s]+)[\'"]',
-            r'\.setPath\s*\([\'"]([^\'"\s]+)[\'"]',
-            r'`([^`]+?\.(?:mp3|wav|ogg|glb|gltf|jpg|png))`',
-            r'\.join\s*\([\'"]([^\'"\s]+)[\'"]',
-            r'\.resolve\s*\([\'"]([^\'"\s]+)[\'"]',
-            r'[\'"](/[^\'"\s]+\.(?:js|css|png|jpg|jpeg|gif|svg|mp3|wav|json|wasm|glb|gltf|bin|basis|ktx2|drc|ico))[\'"]'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, js_content)
-            for match in matches:
-                if isinstance(match, tuple):
-                    match = match[0]
-                if match and not match.startswith(('http://', 'https://', 'data:', 'blob:', 'javascript:')):
-                    match = match.strip('\'"`')
-                    if match.startswith('./'):
-                        match = match[2:]
-                    for var_name, var_value in path_vars.items():
-                        if var_name in match:
-                            match = match.replace(var_name, var_value)
-                    resources.add(urljoin(base_url, match))
+        for found in itertools.chain(_JS_RESOURCE_RE.finditer(js_content), _JS_TEMPLATE_RE.finditer(js_content)):
+            match = found.group(found.lastindex)
+            if match and not match.startswith((b'http://', b'https://', b'data:', b'blob:', b'javascript:')):
+                match = match.strip(b'\'"`')
+                if match.startswith(b'./'):
+                    match = match[2:]
+                for var_name, var_value in path_vars.items():
+                    if var_name in match:
+                        match = match.replace(var_name, var_value)
+                resources.add(match.decode('utf-8', 'ignore'))
 
-        imports = re.finditer(r'(?:import|require)\s*\(\s*[\'"]([^\'"\s]+)[\'"]', js_content)
+        imports = _IMPORT_RE.finditer(js_content)
         for match in imports:
             path = match.group(1)
-            if not path.startswith(('http://', 'https://', 'data:', 'blob:')):
-                resources.add(urljoin(base_url, path))
+            if not path.startswith((b'http://', b'https://', b'data:', b'blob:')):
+                resources.add(path.decode('utf-8', 'ignore'))
 
         return resources
 
-    def extract_resources(self, soup, base_url):
+    async def fetch_bytes(self, url, session):
+        async with session.get(url) as response:
+            if response.status == 200:
+                return await response.read()
+        return None
+
+    async def extract_resources(self, tree, base_url, session):
         resources = set()
+        join = _make_url_joiner(base_url)
         
-        for script in soup.find_all('script', src=True):
-            script_url = urljoin(base_url, script['src'])
-            resources.add(script_url)
-            try:
-                response = requests.get(script_url)
-                if response.status_code == 200:
-                    js_resources = self.analyze_javascript(response.text, base_url)
-                    resources.update(js_resources)
-            except Exception as e:
-                self.logger.error(f"Error analyzing script {script_url}: {str(e)}")
+        script_urls = [join(src) for src in _SCRIPT_SRC_XPATH(tree)]
+        css_urls = [join(href) for href in _STYLESHEET_HREF_XPATH(tree) if href]
+        resources.update(script_urls)
+        resources.update(css_urls)
+        
+        # Fetch every external script and stylesheet concurrently
+        bodies = await asyncio.gather(
+            *[self.fetch_bytes(u, session) for u in script_urls + css_urls],
+            return_exceptions=True
+        )
+        script_bodies = bodies[:len(script_urls)]
+        css_bodies = bodies[len(script_urls):]
+        
+        for script_url, js_content in zip(script_urls, script_bodies):
+            if isinstance(js_content, Exception):
+                self.logger.error(f"Error analyzing script {script_url}: {str(js_content)}")
+            elif js_content is not None:
+                js_resources = self.analyze_javascript(js_content, base_url, cacheable=True)
+                resources.update(js_resources)
         
-        for script in soup.find_all('script'):
-            if script.string:
-                js_resources = self.analyze_javascript(script.string, base_url)
+        for js_content in _INLINE_SCRIPT_XPATH(tree):
+            if js_content:
+                js_resources = self.analyze_javascript(js_content.encode('utf-8', 'surrogatepass'), base_url)
                 resources.update(js_resources)
         
-        for css in soup.find_all('link', rel='stylesheet'):
-            if css.get('href'):
-                css_url = urljoin(base_url, css['href'])
-                resources.add(css_url)
-                try:
-                    response = requests.get(css_url)
-                    if response.status_code == 200:
-                        css_content = response.text
-                        url_patterns = [
-                            r'url\([\'"]?([^\'"\)]+)[\'"]?\)',
-                            r'@import\s+[\'"]([^\'"\s]+)[\'"]'
-                        ]
-                        for pattern in url_patterns:
-                            matches = re.findall(pattern, css_content)
-                            for match in matches:
-                                if not match.startswith(('http://', 'https://', 'data:', 'blob:')):
-                                    resources.add(urljoin(base_url, match))
-                except Exception as e:
-                    self.logger.error(f"Error analyzing CSS {css_url}: {str(e)}")
+        for css_url, css_content in zip(css_urls, css_bodies):
+            if isinstance(css_content, Exception):
+                self.logger.error(f"Error analyzing CSS {css_url}: {str(css_content)}")
+            elif css_content is not None:
+                for pattern in _CSS_URL_PATTERNS:
+                    matches = pattern.findall(css_content)
+                    for match in matches:
+                        if not match.startswith((b'http://', b'https://', b'data:', b'blob:')):
+                            resources.add(join(match.decode('utf-8', 'ignore')))
         
-        for tag in soup.find_all(['img', 'video', 'audio', 'source', 'model-viewer', 'canvas']):
+        for tag in tree.iter('img', 'video', 'audio', 'source', 'model-viewer', 'canvas'):
             for attr in ['src', 'data-src', 'srcset', 'href', 'data-model', 'data-texture']:
                 if tag.get(attr):
                     if attr == 'srcset':
-                        for src_str in tag[attr].split(','):
+                        for src_str in tag.get(attr).split(','):
                             url = src_str.strip().split()[0]
-                            resources.add(urljoin(base_url, url))
+                            resources.add(join(url))
                     else:
-                        resources.add(urljoin(base_url, tag[attr]))
+                        resources.add(join(tag.get(attr)))
         
-        for meta in soup.find_all('meta'):
+        for meta in tree.iter('meta'):
             if meta.get('content') and meta.get('content').startswith(('/','http')):
-                if any(key in str(meta) for key in ['image', 'video', 'audio', 'model']):
-                    resources.add(urljoin(base_url, meta['content']))
+                meta_attrs = ' '.join(f'{k}={v}' for k, v in meta.items())
+                if any(key in meta_attrs for key in ['image', 'video', 'audio', 'model']):
+                    resources.add(join(meta.get('content')))
         
-        for tag in soup.find_all(True):
-            for attr in tag.attrs:
-                if isinstance(tag[attr], str):
-                    if any(ext in tag[attr].lower() for ext in ['.glb', '.gltf', '.bin', '.jpg', '.png', '.basis']):
-                        resources.add(urljoin(base_url, tag[attr]))
+        # Any attribute value on any tag that references a model or texture
+        for value in _EXT_ATTR_XPATH(tree):
+            value = value.strip()
+            # Space-separated lists such as srcset are split by the media tag pass
+            if value and not any(c.isspace() for c in value):
+                resources.add(join(value))
         
         return resources
 
-    async def process_page(self, url):
-        if url in self.visited_urls:
-            return
-        
-        self.visited_urls.add(url)
-        self.logger.info(f"Processing page: {url}")
+    async def crawl_worker(self, queue):
+        while True:
+            url = await queue.get()
+            try:
+                for next_url in await self.scrape_page(url):
+                    key = _url_key(next_url)
+                    # Marked before queueing so no other worker picks it up twice
+                    if key not in self.visited_urls:
+                        self.visited_urls.add(key)
+                        queue.put_nowait(next_url)
+            finally:
+                queue.task_done()
+
+    async def print_help(self):
+        print("\n" + _HELP)
+
+    async def print_current_url(self):
+        current_url = await asyncio.to_thread(getattr, self.driver, 'current_url')
+        print(f"Current URL: {current_url}")
+
+    async def wait_for_loading(self):
+        print("Waiting 5 seconds...")
+        await asyncio.to_thread(self.driver.execute_script, "return new Promise(resolve => setTimeout(resolve, 5000));")
+        print("Done waiting")
+
+    async def refresh_page(self):
+        print("Refreshing page...")
+        await asyncio.to_thread(self.driver.refresh)
+        await asyncio.to_thread(self.driver.execute_script, "return new Promise(resolve => setTimeout(resolve, 2000));")
+        print("Page refreshed")
+
+    async def load_page(self, url):
+        """Load a page in the browser off the event loop; callers hold driver_lock."""
+        await asyncio.to_thread(self.driver.get, url)
         
-        try:
-            self.driver.get(url)
-            
-            if self.interactive:
-                print("\nBrowser is open for interactive exploration.")
-                print("Navigate the site to expose dynamic content.")
-                print("Commands:")
-                print("  done    - Start scraping the current state")
-                print("  help    - Show this help message")
-                print("  url     - Show current URL")
-                print("  wait    - Wait 5 more seconds for loading")
-                print("  refresh - Refresh the page")
-                
-                while True:
-                    user_input = input("> ").strip().lower()
-                    if user_input == 'done':
-                        break
-                    elif user_input == 'help':
-                        print("\nCommands:")
-                        print("  done    - Start scraping the current state")
-                        print("  help    - Show this help message")
-                        print("  url     - Show current URL")
-                        print("  wait    - Wait 5 more seconds for loading")
-                        print("  refresh - Refresh the page")
-                    elif user_input == 'url':
-                        print(f"Current URL: {self.driver.current_url}")
-                    elif user_input == 'wait':
-                        print("Waiting 5 seconds...")
-                        self.driver.execute_script("return new Promise(resolve => setTimeout(resolve, 5000));")
-                        print("Done waiting")
-                    elif user_input == 'refresh':
-                        print("Refreshing page...")
-                        self.driver.refresh()
-                        self.driver.execute_script("return new Promise(resolve => setTimeout(resolve, 2000));")
-                        print("Page refreshed")
-            else:
-                # Wait for initial page load
-                self.driver.execute_script("""
-                    return new Promise((resolve) => {
-                        if (document.readyState === 'complete') {
-                            setTimeout(resolve, 2000);
-                        } else {
-                            window.addEventListener('load', () => setTimeout(resolve, 2000));
-                        }
-                    });
-                """)
+        if self.interactive:
+            print("\nBrowser is open for interactive exploration.")
+            print("Navigate the site to expose dynamic content.")
+            print(_HELP)
             
-            # Additional wait for dynamic content
-            self.driver.execute_script("""
-                return new Promise((resolve) => {
+            commands = {
+                'help': self.print_help,
+                'url': self.print_current_url,
+                'wait': self.wait_for_loading,
+                'refresh': self.refresh_page,
+            }
+            while True:
+                # Read on a worker thread so pending downloads keep running
+                user_input = (await asyncio.to_thread(input, "> ")).strip().lower()
+                if user_input == 'done':
+                    break
+                command = commands.get(user_input)
+                if command:
+                    await command()
+        
+        # Wait for the load event (already past after interactive exploration)
+        # and then for pending resources, in a single script round-trip
+        await asyncio.to_thread(self.driver.execute_script, """
+            const waitForLoad = arguments[0];
+            return new Promise((resolve) => {
+                const checkResources = () => {
                     const start = performance.now();
-                    const checkResources = () => {
+                    const poll = () => {
                         const pending = performance.getEntriesByType('resource')
                             .filter(r => !r.responseEnd);
                         if (pending.length === 0 || performance.now() - start > 10000) {
                             resolve();
                         } else {
-                            setTimeout(checkResources, 100);
+                            setTimeout(poll, 100);
                         }
                     };
+                    poll();
+                };
+                if (!waitForLoad) {
                     checkResources();
-                });
-            """)
+                } else if (document.readyState === 'complete') {
+                    setTimeout(checkResources, 2000);
+                } else {
+                    window.addEventListener('load', () => setTimeout(checkResources, 2000));
+                }
+            });
+        """, not self.interactive)
+        
+        page_source = await asyncio.to_thread(getattr, self.driver, 'page_source')
+        
+        # Collect browser-observed resources before releasing the driver
+        loaded_resources = await asyncio.to_thread(self.driver.execute_script, """
+            const resources = new Set();
+            performance.getEntriesByType('resource').forEach(entry => {
+                resources.add(entry.name);
+            });
+            
+            const getElementResources = (tagName, attrs) => {
+                return Array.from(document.getElementsByTagName(tagName))
+                    .map(el => attrs.map(attr => el[attr]))
+                    .flat()
+                    .filter(url => url && !url.startsWith('data:') && !url.startsWith('blob:'));
+            };
             
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
+            [
+                ['script', ['src']],
+                ['link', ['href']],
+                ['img', ['src', 'currentSrc']],
+                ['audio', ['src']],
+                ['video', ['src']],
+                ['source', ['src']],
+                ['object', ['data']],
+                ['embed', ['src']]
+            ].forEach(([tag, attrs]) => {
+                getElementResources(tag, attrs).forEach(url => resources.add(url));
+            });
+            
+            return Array.from(resources);
+        """)
+        
+        return page_source, loaded_resources
+
+    async def scrape_page(self, url):
+        self.logger.info(f"Processing page: {url}")
+        
+        try:
+            async with self.driver_lock:
+                page_source, loaded_resources = await self.load_page(url)
+            
+            tree = lxml_html.fromstring(page_source)
             
             url_path = urlparse(url).path
             if not url_path:
                 url_path = 'index.html'
             elif not url_path.endswith('.html'):
-                url_path = os.path.join(url_path, 'index.html')
+                url_path = posixpath.join(url_path, 'index.html')
                 
             save_path = self.create_directory_structure(url_path)
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            with open(save_path, 'w', encoding='utf-8') as f:
-                f.write(page_source)
+            async with aiofiles.open(save_path, 'w', encoding='utf-8') as f:
+                await f.write(page_source)
             
-            page_resources = self.extract_resources(soup, url)
+            page_resources = await self.extract_resources(tree, url, self.session)
             resources = set(page_resources)
             
-            loaded_resources = self.driver.execute_script("""
-                const resources = new Set();
-                performance.getEntriesByType('resource').forEach(entry => {
-                    resources.add(entry.name);
-                });
-                
-                const getElementResources = (tagName, attrs) => {
-                    return Array.from(document.getElementsByTagName(tagName))
-                        .map(el => attrs.map(attr => el[attr]))
-                        .flat()
-                        .filter(url => url && !url.startsWith('data:') && !url.startsWith('blob:'));
-                };
-                
-                [
-                    ['script', ['src']],
-                    ['link', ['href']],
-                    ['img', ['src', 'currentSrc']],
-                    ['audio', ['src']],
-                    ['video', ['src']],
-                    ['source', ['src']],
-                    ['object', ['data']],
-                    ['embed', ['src']]
-                ].forEach(([tag, attrs]) => {
-                    getElementResources(tag, attrs).forEach(url => resources.add(url));
-                });
-                
-                return Array.from(resources);
-            """)
-            
             for resource in loaded_resources:
                 if resource:
                     resources.add(resource)
             
             self.logger.info(f"Found {len(resources)} resources to download")
             
-            async with aiohttp.ClientSession() as session:
-                tasks = [self.download_resource(res, session) for res in resources]
-                with tqdm(total=len(tasks), desc="Downloading resources") as pbar:
-                    for task in asyncio.as_completed(tasks):
-                        await task
-                        pbar.update(1)
+            # Skip finished downloads and ones another page already started;
+            # claiming the key here keeps two pages from writing the same file
+            to_fetch = {}
+            for res in resources:
+                key = _url_key(res)
+                if key not in self.downloaded_files and key not in self.downloads_in_flight:
+                    self.downloads_in_flight.add(key)
+                    to_fetch[key] = res
+            # Pages download concurrently, so they all feed one crawl-wide bar,
+            # opened after the first page load to stay clear of interactive mode
+            if self.progress is None:
+                self.progress = tqdm(total=0, desc="Downloading resources")
+            self.progress.total += len(to_fetch)
+            self.progress.refresh()
+            tasks = []
+            for key, res in to_fetch.items():
+                task = asyncio.create_task(self.download_resource(res, self.session))
+                task.add_done_callback(lambda _, key=key: self.downloads_in_flight.discard(key))
+                task.add_done_callback(lambda _: self.progress.update(1))
+                tasks.append(task)
+            await asyncio.gather(*tasks)
             
+            next_urls = set()
             if not self.interactive:
-                for link in soup.find_all('a', href=True):
-                    next_url = urljoin(url, link['href'])
+                join = _make_url_joiner(url)
+                for href in _LINK_HREF_XPATH(tree):
+                    next_url = join(href)
                     if (next_url.startswith(self.base_url) and 
-                        next_url not in self.visited_urls and 
+                        _url_key(next_url) not in self.visited_urls and 
                         not next_url.endswith(('.pdf', '.jpg', '.png', '.gif'))):
-                        await self.process_page(next_url)
+                        next_urls.add(next_url)
+            return next_urls
                     
         except Exception as e:
             self.logger.error(f"Error processing {url}: {str(e)}")
@@ -376,13 +555,36 @@ class SiteScraper:
 
     async def scrape(self):
         self.logger.info(f"Starting scrape of {self.base_url}")
-        os.makedirs(self.output_dir, exist_ok=True)
+        self.ensure_dir(self.output_dir)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, limit_per_host=16, ttl_dns_cache=300),
+            # No overall cap, since streamed downloads of large assets can run long
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+        )
+        self.driver_lock = asyncio.Lock()
+        
+        queue = asyncio.Queue()
+        self.visited_urls.add(_url_key(self.base_url))
+        queue.put_nowait(self.base_url)
+        workers = [asyncio.create_task(self.crawl_worker(queue)) for _ in range(8)]
+        queue_done = asyncio.create_task(queue.join())
         
         try:
-            await self.process_page(self.base_url)
+            await asyncio.wait([queue_done, *workers], return_when=asyncio.FIRST_COMPLETED)
+            # Workers loop forever, so one that finished hit an error in scrape_page
+            for worker in workers:
+                if worker.done():
+                    worker.result()
             self.logger.info(f"Scraping completed! Downloaded {len(self.downloaded_files)} files")
             self.logger.info(f"Files saved in: {self.output_dir}")
         finally:
+            queue_done.cancel()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(queue_done, *workers, return_exceptions=True)
+            if self.progress is not None:
+                self.progress.close()
+            await self.session.close()
             self.driver.quit()
 
 def main():
@@ -397,7 +599,9 @@ def main():
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
     
     scraper = SiteScraper(args.url, args.output, args.interactive)
-    asyncio.run(scraper.scrape())
+    # Route console log lines through tqdm so they don't break up the progress bar
+    with logging_redirect_tqdm():
+        asyncio.run(scraper.scrape())
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file